@@ -1,4 +1,6 @@
 import re
+import sys
+import functools
 import queue
 import time
 import typing as t
@@ -7,15 +9,24 @@ import traceback
 import subprocess
 import configparser
 from pathlib import Path
+from dataclasses import dataclass, field
 
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from spotipy import Spotify
+from spotipy.exceptions import SpotifyException
 from spotipy.oauth2 import SpotifyOAuth
 from rich.console import Console
 from rich.markup import escape
 from rich.prompt import Prompt
 
+from aurora_spsc import SPSCRing
+
 SCRIPT_VERSION = "2.1"
 SPOTIPY_REDIRECT_URI = "http://127.0.0.1:8888/callback"
+MAX_POLL_DELAY_SECONDS = 5.0
+LONG_POLL_DELAY_SECONDS = 30.0
 SPOTIPY_SCOPE = (
     "user-read-playback-state "
     "user-read-currently-playing "
@@ -28,13 +39,42 @@ BASE_DIR = Path(__file__).resolve().parent
 CONFIG_FILE = BASE_DIR / "config.ini"
 FAILED_TXT = BASE_DIR / "failed_tracks.txt"
 
-current_ffmpeg_process: t.Optional[subprocess.Popen] = None
-current_recording_info: dict = {}
-standby_ffmpeg_process: t.Optional[subprocess.Popen] = None
-standby_file: t.Optional[Path] = None
 
-finalization_task_queue: "queue.Queue[dict]" = queue.Queue()
-stop_worker_event = threading.Event()
+# slotted where the interpreter supports it (3.10+)
+_DATACLASS_SLOTS: dict = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_SLOTS)
+class RecordingInfo:
+    process_obj: t.Optional[subprocess.Popen]
+    track_id: t.Optional[str]
+    start_ns: int  # time.time_ns() when the capture was armed
+    audio_path: Path
+    final_path: Path
+    metadata: dict
+    expected_duration_sec: float
+    stop_reason: str = ""
+    rewrite_enabled: bool = False
+    force_rewrite: bool = False
+    end_mono: float = float("inf")  # time.monotonic() at which the track should be ~200 ms from its end
+    # set by the finalizer once this recording is done with, whatever the outcome
+    done: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
+
+@dataclass
+class StandbyState:
+    proc: t.Optional[subprocess.Popen] = None
+    path: t.Optional[Path] = None
+
+standby = StandbyState()
+
+FINALIZATION_QUEUE_MAXSIZE = 32
+FINALIZATION_PUT_TIMEOUT = 30.0
+# one producer (the recording loop) and one consumer (the finalization dispatcher)
+finalization_task_queue: "SPSCRing[t.Optional[RecordingInfo]]" = SPSCRing(FINALIZATION_QUEUE_MAXSIZE)
+# set by the finalizer (and anything else with news) to cut a monitor-loop wait short
+wake_event = threading.Event()
+
+_settings_cache: t.Optional[t.Tuple[float, "Settings"]] = None
+_spotify_client: t.Optional[Spotify] = None
 
 class Settings(t.TypedDict):
     output_directory: Path
@@ -47,13 +87,23 @@ class Settings(t.TypedDict):
     skip_existing_file: bool
     organize_by_artist_album: bool
     rewrite_headers_enabled: bool
+    force_header_rewrite: bool
     preroll_ms: int
     gap_seconds: float
     standby_seconds: float
 
+_FS_ALLOWED = " ._-"
+_SANITIZE_BYTES = bytes(c if chr(c).isalnum() or chr(c) in _FS_ALLOWED else ord("_") for c in range(128)) + b"_" * 128
+_COLLAPSE_RE = re.compile(r"[_ ]{2,}")
+
+@functools.lru_cache(maxsize=4096)
 def sanitize_for_filesystem(text: str, max_len: int = 70) -> str:
-    text = "".join(c if c.isalnum() or c in " ._-" else "_" for c in str(text)).strip()
-    text = re.sub(r"[_ ]{2,}", "_", text)
+    text = str(text)
+    if text.isascii():
+        text = text.encode("ascii").translate(_SANITIZE_BYTES).decode("ascii").strip()
+    else:
+        text = "".join(c if c.isalnum() or c in _FS_ALLOWED else "_" for c in text).strip()
+    text = _COLLAPSE_RE.sub("_", text)
     return text[:max_len].strip("_")
 
 def fmt_time(sec: float) -> str:
@@ -63,6 +113,46 @@ def fmt_time(sec: float) -> str:
     s = int(sec % 60)
     return f"{m:02d}:{s:02d}"
 
+def next_poll_delay(meta: t.Optional[dict], interval: float, preroll_ms: int = 0, max_delay: float = MAX_POLL_DELAY_SECONDS) -> float:
+    # Poll coarsely while the track is far from its end, land ~2s before the
+    # boundary, then tighten: configured interval, and 0.1s in the last second.
+    if not meta or not meta.get("is_playing"):
+        return interval
+    try:
+        remaining = (float(meta.get("duration_ms", 0) or 0) - float(meta.get("progress_ms", 0) or 0) - preroll_ms) / 1000.0
+    except Exception:
+        return interval
+    if remaining > 2.0:
+        return max(0.5, min(max_delay, remaining - 2.0))
+    if remaining > 1.0:
+        return min(interval, 0.5)
+    return 0.1
+
+# on Windows a blocked Event.wait() does not see Ctrl+C until it returns, so long
+# waits are taken in slices to let KeyboardInterrupt through promptly
+_WAIT_SLICE_SECONDS = 0.5
+
+def wait_or_wake(timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if wake_event.wait(min(remaining, _WAIT_SLICE_SECONDS)):
+            wake_event.clear()
+            return
+
+def enqueue_finalization(task: RecordingInfo) -> bool:
+    try:
+        finalization_task_queue.put(task, timeout=FINALIZATION_PUT_TIMEOUT)
+        return True
+    except queue.Full:
+        # the capture is already stopped; leave the raw file in place rather than stall recording
+        from aurora_io import _take_cover
+        _take_cover(task.metadata.get("id"))  # no finalizer will claim its prefetched cover
+        console.print(f"[red]Finalization backlog full, left unfinalized: {escape(str(task.audio_path))}[/red]")
+        return False
+
 def ensure_default_config(path: Path) -> None:
     if path.exists():
         return
@@ -82,6 +172,7 @@ def ensure_default_config(path: Path) -> None:
         "skip_existing_file": "true",
         "organize_by_artist_album": "true",
         "rewrite_headers_enabled": "true",
+        "force_header_rewrite": "false",
         "preroll_ms": "180",
         "gap_seconds": "5",
         "standby_seconds": "900",
@@ -89,19 +180,54 @@ def ensure_default_config(path: Path) -> None:
     with open(path, "w", encoding="utf-8") as f:
         cfg.write(f)
 
-def safe_spotify_call(func, *args, retries=5, delay=12, **kwargs):
+def safe_spotify_call(func, *args, retries=5, delay=12, reraise=False, **kwargs):
+    # reraise: raise the final error instead of logging it and returning None
     for attempt in range(1, retries + 1):
         try:
             return func(*args, **kwargs)
 
+        except SpotifyException as e:
+            status = e.http_status or 0
+            if status == 429:
+                try:
+                    wait = float((e.headers or {}).get("Retry-After", delay))
+                except (TypeError, ValueError):
+                    wait = delay
+            elif status >= 500:
+                wait = min(delay * 2 ** (attempt - 1), 60)
+            else:
+                if reraise:
+                    raise
+                console.print(f"[red]Spotify API error:[/red] {e}")
+                break
+            if attempt == retries:
+                if reraise:
+                    raise
+                console.print(f"[red]Spotify API error:[/red] {e}")
+                break
+            console.print(f"[yellow]Spotify API busy ({status}), retrying in {wait:.0f}s ({attempt}/{retries})[/yellow]")
+            time.sleep(wait)
+
         except Exception as e:
+            if reraise:
+                raise
             console.print(f"[red]Spotify API error:[/red] {e}")
+            break
+    return None
 
 def read_settings() -> Settings:
+    global _settings_cache
     ensure_default_config(CONFIG_FILE)
+    try:
+        mtime = CONFIG_FILE.stat().st_mtime
+    except OSError:
+        mtime = -1.0
+    if _settings_cache is not None and _settings_cache[0] == mtime:
+        # callers may override values from the CLI, so never hand out the cached dict itself
+        return Settings(**_settings_cache[1])
     cfg = configparser.ConfigParser()
     cfg.read(CONFIG_FILE, encoding="utf-8")
-    return {
+    settings: Settings = {
         "output_directory": BASE_DIR / cfg.get("GeneralSettings", "output_directory", fallback="Recordings"),
         "default_format": cfg.get("GeneralSettings", "default_format", fallback="flac").lower(),
         "polling_interval_seconds": cfg.getfloat("GeneralSettings", "polling_interval_seconds", fallback=0.35),
@@ -112,12 +238,29 @@ def read_settings() -> Settings:
         "skip_existing_file": cfg.getboolean("GeneralSettings", "skip_existing_file", fallback=True),
         "organize_by_artist_album": cfg.getboolean("GeneralSettings", "organize_by_artist_album", fallback=True),
         "rewrite_headers_enabled": cfg.getboolean("GeneralSettings", "rewrite_headers_enabled", fallback=True),
+        "force_header_rewrite": cfg.getboolean("GeneralSettings", "force_header_rewrite", fallback=False),
         "preroll_ms": cfg.getint("GeneralSettings", "preroll_ms", fallback=180),
         "gap_seconds": cfg.getfloat("GeneralSettings", "gap_seconds", fallback=5.0),
         "standby_seconds": cfg.getfloat("GeneralSettings", "standby_seconds", fallback=900.0),
     }
+    _settings_cache = (mtime, settings)
+    return Settings(**settings)
+
+def _make_spotify_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=16,
+        # connection/read failures only; 429 and 5xx are retried by safe_spotify_call alone
+        max_retries=Retry(total=3, connect=3, read=2, status=0, backoff_factor=0.5, respect_retry_after_header=False, raise_on_status=False),
+    )
+    session.mount("https://", adapter)
+    return session
 
 def get_spotify_client() -> Spotify:
+    global _spotify_client
+    if _spotify_client is not None:
+        return _spotify_client
     cfg = configparser.ConfigParser()
     cfg.read(CONFIG_FILE, encoding="utf-8")
     cid = cfg.get("SpotifyAPI", "SPOTIPY_CLIENT_ID", fallback="").strip()
@@ -133,7 +276,10 @@ def get_spotify_client() -> Spotify:
             cfg.write(f)
         console.print("[green]Credentials saved[/green]")
 
-    return Spotify(
+    # one keep-alive pool shared by the API client and the token refresher
+    session = _make_spotify_session()
+    _spotify_client = Spotify(
+        requests_session=session,
         auth_manager=SpotifyOAuth(
             client_id=cid,
             client_secret=csec,
@@ -141,9 +287,38 @@ def get_spotify_client() -> Spotify:
             scope=SPOTIPY_SCOPE,
             open_browser=True,
             requests_timeout=15,
-            cache_path=str(BASE_DIR / ".cache-aurora")
+            cache_path=str(BASE_DIR / ".cache-aurora"),
+            requests_session=session,
         )
     )
+    return _spotify_client
+
+def track_meta(item: dict) -> dict:
+    artists = item.get("artists", []) or []
+    names = [a.get("name", "Unknown Artist") for a in artists if isinstance(a, dict)] or ["Unknown Artist"]
+
+    album = item.get("album", {}) or {}
+    images = album.get("images", []) or []
+    cover_url = images[0].get("url") if images else None
+
+    album_artists = album.get("artists", []) or []
+    aa_names = [a.get("name", "Unknown Artist") for a in album_artists if isinstance(a, dict)]
+    album_artist_str = ", ".join(aa_names) if aa_names else ", ".join(names)
+
+    return {
+        "id": item.get("id"),
+        "name": item.get("name", "Unknown Title"),
+        "artists": names,
+        "artist_str": ", ".join(names),
+        "album": album.get("name", "Unknown Album"),
+        "album_release_date": album.get("release_date"),
+        "track_number": item.get("track_number"),
+        "duration_ms": item.get("duration_ms", 0),
+        "album_artist_str": album_artist_str,
+        "composer_str": album_artist_str,
+        "performer_str": album_artist_str,
+        "cover_url": cover_url,
+    }
 
 def current_track(sp: Spotify) -> t.Optional[dict]:
     try:
@@ -155,33 +330,10 @@ def current_track(sp: Spotify) -> t.Optional[dict]:
         if not item or item.get("type") != "track":
             return None
 
-        artists = item.get("artists", []) or []
-        names = [a.get("name", "Unknown Artist") for a in artists if isinstance(a, dict)] or ["Unknown Artist"]
-
-        album = item.get("album", {}) or {}
-        images = album.get("images", []) or []
-        cover_url = images[0].get("url") if images else None
-
-        album_artists = album.get("artists", []) or []
-        aa_names = [a.get("name", "Unknown Artist") for a in album_artists if isinstance(a, dict)]
-        album_artist_str = ", ".join(aa_names) if aa_names else ", ".join(names)
-
-        return {
-            "id": item.get("id"),
-            "name": item.get("name", "Unknown Title"),
-            "artists": names,
-            "artist_str": ", ".join(names),
-            "album": album.get("name", "Unknown Album"),
-            "album_release_date": album.get("release_date"),
-            "track_number": item.get("track_number"),
-            "duration_ms": item.get("duration_ms", 0),
-            "is_playing": pb.get("is_playing", False),
-            "progress_ms": pb.get("progress_ms", 0),
-            "album_artist_str": album_artist_str,
-            "composer_str": album_artist_str,
-            "performer_str": album_artist_str,
-            "cover_url": cover_url,
-        }
+        meta = track_meta(item)
+        meta["is_playing"] = pb.get("is_playing", False)
+        meta["progress_ms"] = pb.get("progress_ms", 0)
+        return meta
 
     except Exception as e:
         console.print("[red]current_track() error: " + str(e) + "" + escape(traceback.format_exc()))
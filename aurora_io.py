@@ -1,12 +1,15 @@
 from __future__ import annotations
+import os
+import sys
 import typing as t
 import shutil
+import itertools
 import subprocess
 import time
-import queue
-import json
+import threading
 
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 from rich.markup import escape
@@ -15,21 +18,81 @@ from aurora_core import (
     console,
     FAILED_TXT,
     Settings,
+    RecordingInfo,
+    standby,
+    wake_event,
 )
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from mutagen.flac import FLAC, Picture
 
-def ensure_dir(p: Path) -> None:
+try:
+    # optional, several times faster than the stdlib encoder
+    import orjson
+
+    def _json_line(entry: dict) -> bytes:
+        return orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    import json
+
+    def _json_line(entry: dict) -> bytes:
+        return (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def _make_cover_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=4,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# set AURORA_FFMPEG_DEBUG=1 to surface ffmpeg's own warnings on the console
+FFMPEG_DEBUG = os.environ.get('AURORA_FFMPEG_DEBUG', '') == '1'
+FFMPEG_PIPE_BUFSIZE = 64 * 1024
+
+_COVER_SESSION = _make_cover_session()
+_cover_cache: t.Dict[str, bytes] = {}
+# ids with a prefetch outstanding; finalization removes its id so a late download is dropped
+_cover_pending: t.Set[str] = set()
+_cover_lock = threading.Lock()
+# Windows clocks tick in ~15 ms steps, so the timestamp alone can repeat across a quick re-arm
+_standby_seq = itertools.count()
+_ensured_dirs: t.Set[Path] = set()
+_cover_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cover-prefetch')
+
+FINALIZATION_WORKERS = 3
+_log_lock = threading.Lock()
+_inflight = threading.Semaphore(FINALIZATION_WORKERS)
+
+def ensure_dir(p: t.Union[str, Path]) -> None:
+    p = Path(p)
+    if p in _ensured_dirs:
+        return
     p.mkdir(parents=True, exist_ok=True)
+    _ensured_dirs.add(p)
+
+
+def _drain_ffmpeg_stderr(p: subprocess.Popen) -> None:
+    try:
+        for line in iter(p.stderr.readline, b''):
+            console.print(f"[grey50]ffmpeg: {escape(line.decode('utf-8', 'ignore').rstrip())}[/grey50]")
+    except Exception:
+        pass
 
 
 def start_ffmpeg(ffmpeg: str, device: str, dur_s: float, out_path: Path, fmt: str, try_24bit: bool = True) -> subprocess.Popen:
-    import os, sys
     input_format = 'dshow' if os.name == 'nt' else ('avfoundation' if sys.platform == 'darwin' else 'alsa')
     cmd = [
         ffmpeg, '-y',
         '-hide_banner',
+        '-nostats', '-loglevel', 'warning' if FFMPEG_DEBUG else 'error',
         '-fflags', '+nobuffer',
         '-flags', 'low_delay',
         '-thread_queue_size', '1024',
@@ -45,7 +108,23 @@ def start_ffmpeg(ffmpeg: str, device: str, dur_s: float, out_path: Path, fmt: st
     else:
         raise ValueError('Only FLAC is supported in this build')
     cmd.append(str(out_path))
-    return subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if not FFMPEG_DEBUG:
+        # nothing reads stderr in normal runs; a piped but undrained stderr can fill and stall ffmpeg
+        return subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, bufsize=FFMPEG_PIPE_BUFSIZE)
+    p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, bufsize=FFMPEG_PIPE_BUFSIZE)
+    threading.Thread(target=_drain_ffmpeg_stderr, args=(p,), daemon=True).start()
+    return p
+
+
+def _close_and_wait(p: subprocess.Popen, timeout: float) -> None:
+    # stdout is never piped and stderr is either discarded or owned by the drain
+    # thread, so communicate() has nothing to read here and would race that thread
+    try:
+        if p.stdin and not p.stdin.closed:
+            p.stdin.close()
+    except Exception:
+        pass
+    p.wait(timeout=timeout)
 
 
 def kill_ffmpeg(p: t.Optional[subprocess.Popen]) -> None:
@@ -58,11 +137,11 @@ def kill_ffmpeg(p: t.Optional[subprocess.Popen]) -> None:
             except Exception:
                 pass
         try:
-            p.communicate(timeout=6)
+            _close_and_wait(p, 6)
         except subprocess.TimeoutExpired:
             p.kill()
             try:
-                p.communicate(timeout=3)
+                p.wait(timeout=3)
             except Exception:
                 pass
     except Exception:
@@ -72,34 +151,114 @@ def kill_ffmpeg(p: t.Optional[subprocess.Popen]) -> None:
             pass
 
 
-def rewrite_headers(audio_path: Path, ffmpeg_path: str) -> bool:
-    if not audio_path.exists() or audio_path.stat().st_size < 1024:
+def _size_or_zero(p: Path) -> int:
+    try:
+        return os.stat(p).st_size
+    except OSError:
+        return 0
+
+
+def _wait_for_stable_size(p: Path, timeout: float = 2.0, interval: float = 0.1) -> None:
+    """Wait until ffmpeg has finished writing p (size unchanged across polls), up to timeout."""
+    prev = -1
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        size = _size_or_zero(p)
+        if size == prev and size > 1024:
+            return
+        prev = size
+        time.sleep(interval)
+
+
+def has_valid_flac_header(p: Path) -> bool:
+    """True if p starts with the fLaC marker followed by a well-formed STREAMINFO block."""
+    try:
+        with open(p, 'rb') as f:
+            head = f.read(8)
+    except OSError:
+        return False
+    return len(head) == 8 and head[:4] == b'fLaC' and head[4] & 0x7f == 0 and int.from_bytes(head[5:8], 'big') == 34
+
+
+def is_valid_recording(p: Path, min_bytes: int) -> bool:
+    """True if p holds at least min_bytes and, for FLAC, a STREAMINFO with a non-zero block size."""
+    try:
+        with open(p, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            head = f.read(16) if p.suffix.lower() == '.flac' else None
+    except OSError:
+        return False
+    if size < min_bytes:
+        return False
+    if head is None:
+        return True
+    return (len(head) == 16 and head[:4] == b'fLaC' and head[4] & 0x7f == 0
+            and int.from_bytes(head[8:10], 'big') != 0)
+
+
+def rewrite_headers(audio_path: Path, ffmpeg_path: str, size: t.Optional[int] = None) -> bool:
+    if size is None:
+        size = _size_or_zero(audio_path)
+    if size < 1024:
         return False
     tmp = audio_path.with_name(audio_path.stem + "_rewrite_temp" + audio_path.suffix)
     cmd = [ffmpeg_path, '-y', '-i', str(audio_path), '-acodec', 'copy', '-vn', '-map_metadata', '-1', str(tmp)]
     try:
         r = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=120)
-        if r.returncode == 0 and tmp.exists() and tmp.stat().st_size >= 1024:
+        if r.returncode == 0 and _size_or_zero(tmp) >= 1024:
             audio_path.unlink(missing_ok=True); tmp.rename(audio_path); return True
     finally:
         tmp.unlink(missing_ok=True)
     return False
 
 
-def download_cover(url: t.Optional[str], dest: Path) -> bool:
+def download_cover(url: t.Optional[str]) -> t.Optional[bytes]:
     if not url:
-        return False
+        return None
     try:
-        r = requests.get(url, timeout=10); r.raise_for_status(); dest.write_bytes(r.content); return True
+        r = _COVER_SESSION.get(url, timeout=10); r.raise_for_status()
+        return r.content or None
     except Exception:
-        return False
+        return None
+
+
+def _prefetch_cover(track_id: str, url: str) -> None:
+    data = download_cover(url)
+    with _cover_lock:
+        if track_id in _cover_pending:
+            _cover_pending.discard(track_id)
+            if data:
+                _cover_cache[track_id] = data
+
+
+def _take_cover(track_id: t.Optional[str]) -> t.Optional[bytes]:
+    with _cover_lock:
+        _cover_pending.discard(track_id)
+        return _cover_cache.pop(track_id, None)
+
+
+def prefetch_cover(track_id: t.Optional[str], url: t.Optional[str]) -> None:
+    """Fetch cover art in the background while the track is still recording."""
+    if not track_id or not url:
+        return
+    with _cover_lock:
+        if track_id in _cover_cache or track_id in _cover_pending:
+            return
+        _cover_pending.add(track_id)
+    _cover_prefetch_pool.submit(_prefetch_cover, track_id, url)
 
 
-def embed_flac(audio_path: Path, meta: dict, cover_path: t.Optional[Path]) -> None:
+def embed_flac(audio_path: Path, meta: dict, cover: t.Optional[bytes]) -> None:
     if not audio_path.exists() or audio_path.suffix.lower() != '.flac':
         return
     try:
         fl = FLAC(audio_path)
+        # drop whatever ffmpeg wrote so the single save() below leaves only our tags
+        if fl.tags is not None:
+            fl.tags.clear()
+        else:
+            fl.add_tags()
+        fl.clear_pictures()
         fl['TITLE'] = meta.get('name', 'Unknown Title')
         fl['ARTIST'] = meta.get('artist_str', 'Unknown Artist')
         fl['ALBUM'] = meta.get('album', 'Unknown Album')
@@ -111,15 +270,15 @@ def embed_flac(audio_path: Path, meta: dict, cover_path: t.Optional[Path]) -> No
             fl['DATE'] = y; fl['YEAR'] = y
         if meta.get('track_number'): fl['TRACKNUMBER'] = str(meta['track_number'])
         if meta.get('id'): fl['SPOTIFY_TRACK_ID'] = meta['id']
-        if cover_path and cover_path.exists():
-            pic = Picture(); pic.data = cover_path.read_bytes(); pic.type = 3; pic.mime = 'image/jpeg'; fl.add_picture(pic)
+        if cover:
+            pic = Picture(); pic.data = cover; pic.type = 3; pic.mime = 'image/jpeg'; fl.add_picture(pic)
         fl.save()
     except Exception as e:
         console.print(f"[yellow]Embed error for {audio_path.name}: {e}[/yellow]")
 
 def robust_move(src: Path, dst: Path) -> Path:
     """Move/rename even if src is on Windows and was just closed by ffmpeg."""
-    dst.parent.mkdir(parents=True, exist_ok=True)
+    ensure_dir(dst.parent)
     try:
         src.replace(dst)
         return dst
@@ -133,128 +292,165 @@ def robust_move(src: Path, dst: Path) -> Path:
             return dst
 
 
-def finalization_worker(ffmpeg_path: str, log_file: Path):
-    console.print("[cyan]Finalization worker started.[/cyan]")
-    from aurora_core import finalization_task_queue, stop_worker_event
-    while not stop_worker_event.is_set() or not finalization_task_queue.empty():
+_UTC = timezone.utc
+
+def _iso_utc(ts: float) -> str:
+    return datetime.fromtimestamp(ts, _UTC).isoformat(timespec='milliseconds')
+
+
+def _finalize_task(task: RecordingInfo, ffmpeg_path: str, log_fp: t.BinaryIO, failed_fp: t.TextIO) -> None:
+    proc = task.process_obj
+    temp_path = task.audio_path
+    final_path = task.final_path or temp_path
+    meta = task.metadata
+    start_ns = task.start_ns
+    expected_duration_sec = task.expected_duration_sec
+    stop_reason = task.stop_reason
+    rewrite_enabled = task.rewrite_enabled
+    force_rewrite = task.force_rewrite
+    # claimed up front so the cache entry goes away on every exit path below
+    cover = _take_cover(meta.get('id'))
+
+    if proc and proc.poll() is None:
         try:
-            task = finalization_task_queue.get(timeout=1)
-        except queue.Empty:
-            continue
+            _close_and_wait(proc, 8)
+        except subprocess.TimeoutExpired:
+            try:
+                proc.kill(); proc.wait(timeout=3)
+            except Exception:
+                pass
+        _wait_for_stable_size(temp_path)
+
+    # If still in __arming__/__standby__, move now to final
+    audio_path = temp_path
+    if "__arming__" in temp_path.parts or "__standby__" in temp_path.parts:
         try:
-            proc: subprocess.Popen = task['process_obj']
-            temp_path: Path = task['audio_path']
-            final_path: Path = task.get('final_path', temp_path)
-            meta: dict = task['metadata']
-            start_iso: str = task['start_iso']
-            expected_duration_sec: float = task['expected_duration_sec']
-            stop_reason: str = task['stop_reason']
-            rewrite_enabled: bool = task.get('rewrite_enabled', True)
-
-            if proc and proc.poll() is None:
-                try:
-                    proc.communicate(timeout=8)
-                except subprocess.TimeoutExpired:
-                    try:
-                        proc.kill(); proc.communicate(timeout=3)
-                    except Exception:
-                        pass
-                time.sleep(5)
-
-            # If still in __arming__, move now to final
+            audio_path = robust_move(temp_path, final_path)
+        except Exception as e:
+            console.print(f"[yellow]Move failed: {escape(str(e))}[/yellow]")
             audio_path = temp_path
-            if str(temp_path).find("__arming__") != -1:
-                try:
-                    audio_path = robust_move(temp_path, final_path)
-                except Exception as e:
-                    console.print(f"[yellow]Move failed: {escape(str(e))}[/yellow]")
-                    audio_path = temp_path
 
-            if not (audio_path.exists() and audio_path.stat().st_size > 1024):
-                finalization_task_queue.task_done(); continue
+    audio_size = _size_or_zero(audio_path)
+    if audio_size <= 1024:
+        return
 
-            rewrite_ok = False
-            if rewrite_enabled:
-                rewrite_ok = rewrite_headers(audio_path, ffmpeg_path)
+    # fetch the cover (unless prefetched) while the remux below runs
+    cover_future = None
+    if cover is None and meta.get('cover_url'):
+        cover_future = _cover_prefetch_pool.submit(download_cover, meta.get('cover_url'))
 
-            try:
-                st_dt = datetime.fromisoformat(start_iso)
-                if st_dt.tzinfo is None:
-                    st_dt = st_dt.replace(tzinfo=timezone.utc)
-                rec_sec = (datetime.now(timezone.utc) - st_dt).total_seconds()
-            except Exception:
-                rec_sec = -1
-
-            sp_dur = (float(meta.get('duration_ms', 0) or 0) / 1000.0)
-            min_required = max(sp_dur - 3.0, 0.0)
-            if rec_sec > 0 and rec_sec < min_required:
-                try: audio_path.unlink(missing_ok=True)
-                except Exception: pass
-                try:
-                    with open(FAILED_TXT, 'a', encoding='utf-8') as f:
-                        f.write(f"{meta.get('artist_str','Unknown Artist')} - {meta.get('name','Unknown Title')}\n")
-                except Exception as e:
-                    console.print(f"[yellow]failed_tracks.txt write error: {e}[/yellow]")
-                finalization_task_queue.task_done(); continue
-
-            cover = audio_path.with_name(audio_path.stem + '_cover.jpg')
-            cover_ok = download_cover(meta.get('cover_url'), cover)
-            try:
-                embed_flac(audio_path, meta, cover if cover_ok else None)
-            finally:
-                if cover.exists():
-                    try: cover.unlink()
-                    except Exception: pass
+    # embed_flac() resets the tags itself; the ffmpeg remux is only a repair
+    # step for captures that were killed before ffmpeg finalized STREAMINFO
+    rewrite_ok = False
+    if rewrite_enabled:
+        if not force_rewrite and proc and proc.returncode == 0 and has_valid_flac_header(audio_path):
+            rewrite_ok = True
+        else:
+            rewrite_ok = rewrite_headers(audio_path, ffmpeg_path, audio_size)
 
-            try:
-                entry = {
-                    'track_id': meta.get('id'),
-                    'title': meta.get('name'),
-                    'artist_str': meta.get('artist_str'),
-                    'album': meta.get('album'),
-                    'start_time': start_iso,
-                    'end_time': datetime.now(timezone.utc).isoformat(),
-                    'original_duration_sec': sp_dur,
-                    'ffmpeg_target_duration_sec': expected_duration_sec,
-                    'recorded_duration_seconds': round(rec_sec, 2) if rec_sec > 0 else 'N/A',
-                    'header_rewrite_successful': rewrite_ok,
-                    'stop_reason': stop_reason,
-                    'filename': str(audio_path),
-                    'format': audio_path.suffix.lstrip('.')
-                }
-                with open(log_file, 'a', encoding='utf-8') as f: f.write(json.dumps(entry) + '')  # type: ignore[name-defined]
-            except Exception as e:
-                console.print(f"[yellow]Log write error: {e}[/yellow]")
-
-            finalization_task_queue.task_done()
+    now = time.time()
+    rec_sec = (now - start_ns / 1e9) if start_ns else -1
+
+    sp_dur = (float(meta.get('duration_ms', 0) or 0) / 1000.0)
+    min_required = max(sp_dur - 3.0, 0.0)
+    if rec_sec > 0 and rec_sec < min_required:
+        if cover_future:
+            cover_future.cancel()
+        try: audio_path.unlink(missing_ok=True)
+        except Exception: pass
+        try:
+            with _log_lock:
+                failed_fp.write(f"{meta.get('artist_str','Unknown Artist')} - {meta.get('name','Unknown Title')}\n")
         except Exception as e:
-            console.print("[bold red][Worker] Finalization error: "+str(e))
-            try: finalization_task_queue.task_done()
-            except Exception: pass
-    console.print("[cyan]Finalization worker stopped.[/cyan]")
+            console.print(f"[yellow]failed_tracks.txt write error: {e}[/yellow]")
+        return
+
+    if cover_future:
+        cover = cover_future.result()
+    embed_flac(audio_path, meta, cover)
+
+    try:
+        entry = {
+            'track_id': meta.get('id'),
+            'title': meta.get('name'),
+            'artist_str': meta.get('artist_str'),
+            'album': meta.get('album'),
+            'start_time': _iso_utc(start_ns / 1e9),
+            'end_time': _iso_utc(now),
+            'original_duration_sec': sp_dur,
+            'ffmpeg_target_duration_sec': expected_duration_sec,
+            'recorded_duration_seconds': round(rec_sec, 2) if rec_sec > 0 else 'N/A',
+            'header_rewrite_successful': rewrite_ok,
+            'stop_reason': stop_reason,
+            'filename': str(audio_path),
+            'format': audio_path.suffix.lstrip('.')
+        }
+        line = _json_line(entry)
+        with _log_lock:
+            # one write syscall per entry; flushed so a crash never loses a finished track
+            log_fp.write(line)
+            log_fp.flush()
+    except Exception as e:
+        console.print(f"[yellow]Log write error: {e}[/yellow]")
+
+
+def _run_finalize_task(task: RecordingInfo, ffmpeg_path: str, log_fp: t.BinaryIO, failed_fp: t.TextIO) -> None:
+    try:
+        _finalize_task(task, ffmpeg_path, log_fp, failed_fp)
+    except Exception as e:
+        console.print("[bold red][Worker] Finalization error: "+str(e))
+    finally:
+        _inflight.release()
+        task.done.set()
+        wake_event.set()
+
 
-standby_ffmpeg_process = None
-standby_file = None
+def finalization_worker(ffmpeg_path: str, log_file: Path):
+    console.print("[cyan]Finalization worker started.[/cyan]")
+    from aurora_core import finalization_task_queue
+    log_fp = open(log_file, 'ab', buffering=1 << 16)
+    failed_fp = open(FAILED_TXT, 'a', encoding='utf-8', buffering=1)
+    # the dispatcher only hands tasks out; capped so concurrent remuxes don't oversubscribe ffmpeg
+    pool = ThreadPoolExecutor(max_workers=FINALIZATION_WORKERS, thread_name_prefix='finalize')
+    try:
+        while True:
+            task = finalization_task_queue.get()
+            if task is None:
+                break
+            # hold tasks in the bounded queue while the pool is saturated so producers feel backpressure
+            _inflight.acquire()
+            pool.submit(_run_finalize_task, task, ffmpeg_path, log_fp, failed_fp)
+    finally:
+        pool.shutdown(wait=True)
+        log_fp.close()
+        failed_fp.close()
+    console.print("[cyan]Finalization worker stopped.[/cyan]")
 
 def ensure_standby(st: Settings):
-    global standby_ffmpeg_process, standby_file
-    if standby_ffmpeg_process is None or standby_ffmpeg_process.poll() is not None:
+    if standby.proc is None or standby.proc.poll() is not None:
         arm_dir = st['output_directory'] / "__standby__"
         ensure_dir(arm_dir)
-        standby_file = arm_dir / f"standby_{int(time.time())}.flac"
-        standby_ffmpeg_process = start_ffmpeg(
-            st['ffmpeg_path'], st['audio_device'], max(10.0, float(st['standby_seconds'])), standby_file, st['default_format']
+        standby.path = arm_dir / f"standby_{time.time_ns()}_{next(_standby_seq)}.flac"
+        standby.proc = start_ffmpeg(
+            st['ffmpeg_path'], st['audio_device'], max(10.0, float(st['standby_seconds'])), standby.path, st['default_format']
         )
         console.print("[grey58]Standby capture armed.[/grey58]")
 
 
+def take_standby() -> t.Tuple[t.Optional[subprocess.Popen], t.Optional[Path]]:
+    """Hand the running standby capture over to the caller; the next ensure_standby() arms a fresh one."""
+    proc, path = standby.proc, standby.path
+    standby.proc = None
+    standby.path = None
+    return proc, path
+
+
 def drop_standby():
-    global standby_ffmpeg_process, standby_file
     try:
-        kill_ffmpeg(standby_ffmpeg_process)
+        kill_ffmpeg(standby.proc)
     finally:
-        standby_ffmpeg_process = None
-    if standby_file and Path(standby_file).exists():
-        try: Path(standby_file).unlink()
+        standby.proc = None
+    if standby.path and Path(standby.path).exists():
+        try: Path(standby.path).unlink()
         except Exception: pass
-    standby_file = None
\ No newline at end of file
+    standby.path = None
@@ -9,18 +9,29 @@
 #
 # Requirements:
 # pip install spotipy mutagen rich requests urllib3
+# Optional: pip install mutagen-rs (faster tag reads for FLACs the built-in block reader can't walk)
 
 from __future__ import annotations
+import os
+import re
+import functools
+import itertools
 import time
+import queue
+import atexit
 import threading
 import typing as t
 from pathlib import Path
-from datetime import datetime, timezone
-
-from mutagen.flac import FLAC, MutagenError
+from concurrent.futures import ThreadPoolExecutor
+
+from mutagen import MutagenError
+try:
+    # optional Rust drop-in, much faster for the read-only library index fallback
+    from mutagen_rs.flac import FLAC
+except ImportError:
+    from mutagen.flac import FLAC
 from rich.panel import Panel
 from rich.text import Text
-from rich.markup import escape
 
 from spotipy import Spotify
 
@@ -28,32 +39,66 @@ from spotipy import Spotify
 from aurora_core import (
     console,
     Settings,
+    RecordingInfo,
     SCRIPT_VERSION,
     read_settings,
     get_spotify_client,
     sanitize_for_filesystem,
     safe_spotify_call,
     current_track,
+    track_meta,
+    next_poll_delay,
+    LONG_POLL_DELAY_SECONDS,
+    wait_or_wake,
+    enqueue_finalization,
 )
 from aurora_io import (
     ensure_dir,
     start_ffmpeg,
     kill_ffmpeg,
     finalization_worker,
+    prefetch_cover,
+    is_valid_recording,
 )
-from aurora_core import (
-    current_ffmpeg_process,
-    current_recording_info,
-    finalization_task_queue,
-    stop_worker_event,
-)
+from aurora_core import finalization_task_queue
 
 # ------------------------ FAILED TRACK LOG ------------------------
 # File where failed track LINKS will be appended (web links)
 FAILED_TRACKS_FILE = Path("failed_tracks.txt")
 
+_FAIL_Q: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+_fail_lock = threading.Lock()
+_fail_pending = threading.Event()
+_fail_writer: t.Optional[threading.Thread] = None
+
+
+def _flush_failed_tracks() -> None:
+    items: list[str] = []
+    while True:
+        try:
+            items.append(_FAIL_Q.get_nowait())
+        except queue.Empty:
+            break
+    if not items:
+        return
+    try:
+        with _fail_lock, open(FAILED_TRACKS_FILE, "a", encoding="utf-8") as fh:
+            fh.write("\n".join(items) + "\n")
+    except Exception:
+        return
+
+
+def _failed_tracks_writer() -> None:
+    # batch whatever piles up in half a second into one append
+    while True:
+        _fail_pending.wait()
+        time.sleep(0.5)
+        _fail_pending.clear()
+        _flush_failed_tracks()
+
 
 def log_failed_track(spotify_uri_or_id: str) -> None:
+    global _fail_writer
     try:
         if not spotify_uri_or_id:
             return
@@ -70,48 +115,142 @@ def log_failed_track(spotify_uri_or_id: str) -> None:
             # if it already looks like a link, keep as-is
             link = spotify_uri_or_id
 
-        with open(FAILED_TRACKS_FILE, "a", encoding="utf-8") as fh:
-            fh.write(link + "\n")
+        if _fail_writer is None:
+            with _fail_lock:
+                if _fail_writer is None:
+                    _fail_writer = threading.Thread(target=_failed_tracks_writer, name="failed-tracks", daemon=True)
+                    _fail_writer.start()
+                    # the writer is a daemon thread; flush anything still queued at exit
+                    atexit.register(_flush_failed_tracks)
+        _FAIL_Q.put(link)
+        _fail_pending.set()
     except Exception:
         # Never raise from logging failures
         return
 
 
 # ------------------------ EXISTING TRACK CHECK ------------------------
-def is_already_recorded_by_spotify_id(final_path: str | Path, spotify_track_id: str) -> bool:
-    try:
-        p = Path(final_path)
-        if not p.exists():
-            return False
+# tag names (lowercase) that may carry the Spotify track id, in order of preference
+_TRACK_ID_TAGS = ("spotify_track_id", "spotify:id", "spotifyid", "trackid", "track_id", "spotify_track")
 
-        f = FLAC(p)
-        tags = f.tags or {}
 
-        # direct uppercase tag (foobar2000 convention)
-        if "SPOTIFY_TRACK_ID" in tags:
-            val = tags["SPOTIFY_TRACK_ID"]
-            if isinstance(val, (list, tuple)):
-                val = val[0] if val else ""
-            return str(val).strip() == str(spotify_track_id).strip()
-
-        # case-insensitive / alternate names
-        lower_map = {k.lower(): k for k in tags.keys()}
-        for candidate in ("spotify_track_id", "spotify:id", "spotifyid", "trackid", "track_id", "spotify_track"):
-            if candidate in lower_map:
-                real_key = lower_map[candidate]
-                val = tags.get(real_key)
-                if isinstance(val, (list, tuple)):
-                    val = val[0] if val else ""
-                return str(val).strip() == str(spotify_track_id).strip()
-
-        return False
+_TRACK_ID_NEEDLES = tuple(tag.encode("ascii") + b"=" for tag in _TRACK_ID_TAGS)
+
+
+def _read_vorbis_comment_block(p: Path) -> bytes | None:
+    """Read only the raw VORBIS_COMMENT block of a FLAC file, seeking over pictures/padding.
+
+    Returns b"" if the file has no comment block, or None if it can't be walked
+    (caller falls back to mutagen).
+    """
+    try:
+        with open(p, "rb") as f:
+            if f.read(4) != b"fLaC":
+                return None
+            while True:
+                hdr = f.read(4)
+                if len(hdr) < 4:
+                    return None
+                last = hdr[0] & 0x80
+                btype = hdr[0] & 0x7F
+                length = int.from_bytes(hdr[1:4], "big")
+                if btype != 4:
+                    if last:
+                        return b""
+                    f.seek(length, 1)
+                    continue
+
+                buf = f.read(length)
+                return buf if len(buf) == length else None
+    except OSError:
+        return None
+
+
+def _track_id_from_comments(buf: bytes) -> str | None:
+    """Find the first track-id tag in a raw comment block with bytes.find instead of decoding every comment."""
+    low = buf.lower()  # keys are case-insensitive ASCII
+    for needle in _TRACK_ID_NEEDLES:
+        i = low.find(needle)
+        while i != -1:
+            # a real comment starts right after its 4-byte little-endian length
+            if i >= 4:
+                n = int.from_bytes(buf[i - 4:i], "little")
+                if len(needle) <= n <= len(buf) - i:
+                    return buf[i + len(needle):i + n].decode("utf-8", "ignore").strip()
+            i = low.find(needle, i + 1)
+    return None
+
+
+def _track_id_via_mutagen(p: str | Path) -> str | None:
+    # fallback for files the block walker above can't read
+    try:
+        tags = FLAC(p).tags or {}
     except MutagenError:
-        return False
+        return None
     except Exception:
-        return False
+        return None
+    lower_map = {k.lower(): k for k in tags.keys()}
+    for candidate in _TRACK_ID_TAGS:
+        if candidate in lower_map:
+            val = tags.get(lower_map[candidate])
+            if isinstance(val, (list, tuple)):
+                val = val[0] if val else ""
+            return str(val).strip()
+    return None
+
+
+def _index_existing(root: Path, min_bytes: int) -> dict[str, Path]:
+    """Map SPOTIFY_TRACK_ID -> file for every FLAC under root, in a single directory walk."""
+    index: dict[str, Path] = {}
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in ("__arming__", "__standby__"):
+                            stack.append(Path(entry.path))
+                        continue
+                    if not entry.name.lower().endswith(".flac") or entry.stat().st_size < min_bytes:
+                        continue
+                except OSError:
+                    continue
+                block = _read_vorbis_comment_block(entry.path)
+                if block is not None:
+                    track_id = _track_id_from_comments(block)
+                else:
+                    track_id = _track_id_via_mutagen(entry.path)
+                if track_id is not None:
+                    index.setdefault(track_id, Path(entry.path))
+    return index
 
 
 # ------------------------ OUTPUT FILENAME ------------------------
+@functools.lru_cache(maxsize=4096)
+def _paths_for(base: Path, organize: bool, artist: str, album: str, title: str, track_number: t.Any, fmt: str) -> Path:
+    target_dir = base / sanitize_for_filesystem(artist) / sanitize_for_filesystem(album) if organize else base
+    return target_dir / out_filename({"name": title, "track_number": track_number}, fmt)
+
+
+def _final_path(meta: dict, base: Path, organize: bool, fmt: str) -> Path:
+    """Final file path for meta (memoized on the fields it depends on), with its folder created."""
+    final_out = _paths_for(
+        base,
+        organize,
+        (meta.get("artists") or ["Unknown Artist"])[0],
+        meta.get("album", "Unknown Album"),
+        meta.get("name", "Unknown Title"),
+        meta.get("track_number"),
+        fmt,
+    )
+    ensure_dir(final_out.parent)
+    return final_out
+
+
 def out_filename(meta: dict, fmt: str) -> str:
     try:
         tn = int(meta.get("track_number") or 0)
@@ -123,8 +262,33 @@ def out_filename(meta: dict, fmt: str) -> str:
 
 
 # ------------------------ RECORDING WORKER ------------------------
+# the capture being monitored; the recording loops below rebind it as a whole,
+# so a reader never sees a process without its info
+current_rec: t.Optional[RecordingInfo] = None
+
+def _classify_stop(meta: t.Optional[dict], info: RecordingInfo) -> t.Optional[str]:
+    """Why the recording of info should stop given the player state meta, or None to keep going."""
+    if not meta or not meta.get("is_playing"):
+        return "Playback stopped or track unavailable"
+    if meta.get("id") != info.track_id:
+        return "Track changed"
+    if time.monotonic() < info.end_mono:
+        return None
+    # deadline reached; confirm against the player, which also absorbs stalls
+    try:
+        prog = float(meta.get("progress_ms", 0) or 0)
+        dur = float(meta.get("duration_ms", 0) or 0)
+    except (TypeError, ValueError):
+        return None
+    # consider finished if within last 200 ms
+    if dur > 0 and prog >= max(0.0, dur - 200):
+        return "Track finished"
+    info.end_mono = time.monotonic() + (dur - prog) / 1000.0 - 0.2
+    return None
+
+
 def record_one_track_blocking(sp: Spotify, st: Settings) -> None:
-    global current_ffmpeg_process, current_recording_info
+    global current_rec
 
     log_file = st["output_directory"] / "aurora_metadata.jsonl"
     ensure_dir(st["output_directory"])
@@ -136,136 +300,195 @@ def record_one_track_blocking(sp: Spotify, st: Settings) -> None:
     )
     worker.start()
 
+    # loop-invariant settings, bound once
+    poll = st["polling_interval_seconds"]
+    preroll_ms = st["preroll_ms"]
+    gap = float(st["gap_seconds"])
+
     try:
         while True:
             meta = current_track(sp)
+            rec = current_rec
 
             # if there's no ffmpeg process, wait until one is set externally
-            if not current_ffmpeg_process:
+            if rec is None:
                 # if playback started elsewhere, just continue waiting
                 if meta and meta.get("is_playing"):
                     pass
             else:
-                stop_reason: t.Optional[str] = None
-
-                if not meta or not meta.get("is_playing"):
-                    stop_reason = "Playback stopped or track unavailable"
-                elif meta.get("id") != current_recording_info.get("track_id"):
-                    stop_reason = "Track changed"
-                else:
-                    try:
-                        prog = float(meta.get("progress_ms", 0) or 0)
-                        dur = float(meta.get("duration_ms", 0) or 0)
-                        # consider finished if within last 200 ms
-                        if dur > 0 and prog >= max(0.0, dur - 200):
-                            stop_reason = "Track finished"
-                    except Exception:
-                        pass
-
+                stop_reason = _classify_stop(meta, rec)
                 if stop_reason:
                     # stop ffmpeg and enqueue finalization
-                    kill_ffmpeg(current_ffmpeg_process)
-                    snap = current_recording_info.copy()
-                    snap["stop_reason"] = stop_reason
-                    finalization_task_queue.put(snap)
-
-                    console.print(f"[grey58]Post-finish {st['gap_seconds']}s window: cleaning up…[/grey58]")
-                    time.sleep(float(st["gap_seconds"]))
-
-                    current_ffmpeg_process = None
-                    current_recording_info = {}
+                    kill_ffmpeg(rec.process_obj)
+                    # hand the record itself to the finalizer; only its done event is read after this
+                    current_rec = None
+                    rec.stop_reason = stop_reason
+                    queued = enqueue_finalization(rec)
+
+                    # move on as soon as this file is finalized; gap_seconds is only the upper bound
+                    console.print(f"[grey58]Post-finish {gap}s window: cleaning up…[/grey58]")
+                    if queued:
+                        rec.done.wait(timeout=gap)
                     break
 
-            time.sleep(st["polling_interval_seconds"])
+            if current_rec is not None:
+                # we started this track ourselves, so only a stall or a user skip can move
+                # the boundary; one call per 30s is enough until ~2s before the end
+                wait_or_wake(next_poll_delay(meta, poll, preroll_ms, LONG_POLL_DELAY_SECONDS))
+            else:
+                wait_or_wake(poll)
     finally:
         # ensure worker termination and ffmpeg killed
-        stop_worker_event.set()
-        kill_ffmpeg(current_ffmpeg_process)
+        if current_rec is not None:
+            kill_ffmpeg(current_rec.process_obj)
+        finalization_task_queue.put(None)
         worker.join(timeout=10)
-        stop_worker_event.clear()
-        current_ffmpeg_process = None
-        current_recording_info = {}
+        current_rec = None
 
 
 # ------------------------ SPOTIFY URI / PLAYLIST PARSING ------------------------
-def get_spotify_uris(sp: Spotify, url_or_id: str) -> list[str]:
+PAGE_FETCH_WORKERS = 8
+# just what track_meta() reads, plus the page total; full playlist items are ~10-30 KB each
+_PLAYLIST_ITEM_FIELDS = (
+    "total,items(track(id,name,track_number,duration_ms,artists(name),"
+    "album(name,release_date,images(url),artists(name))))"
+)
+_SPOTIFY_RE = re.compile(
+    r"(?:spotify:(track|album|playlist):|(?:open\.spotify\.com|spotify\.link)/(?:intl-[\w-]+/)?(track|album|playlist)/)([A-Za-z0-9]{22})"
+)
+
+
+def _iter_pages(fetch: t.Callable[[int], t.Optional[dict]], page_size: int, first: t.Optional[dict] = None) -> t.Iterator[dict]:
+    # the first page is handed out (and tells us the total) right away; the remaining
+    # offsets are then fetched concurrently and yielded in order as they complete.
+    # pass first when another call already returned it
+    if first is None:
+        first = fetch(0)
+    if not first:
+        return
+    yield first
+    offsets = range(page_size, int(first.get("total") or 0), page_size)
+    if not offsets:
+        return
+    # PAGE_FETCH_WORKERS stays within the client's HTTP pool
+    with ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS) as ex:
+        futures = [ex.submit(fetch, offset) for offset in offsets]
+        for offset, fut in zip(offsets, futures):
+            # a page lost to a burst of 429s would silently drop tracks mid-list; retry it once
+            page = fut.result() or fetch(offset)
+            if page:
+                yield page
+
+
+def _track_entry(tr: dict) -> dict:
+    meta = track_meta(tr)
+    meta["uri"] = f"spotify:track:{tr['id']}"
+    return meta
+
+
+def _iter_track(sp: Spotify, rid: str) -> t.Iterator[dict]:
+    res = safe_spotify_call(sp.tracks, [rid]) or {}
+    found = [_track_entry(tr) for tr in res.get("tracks", []) if tr and tr.get("id")]
+    # metadata is optional here; the recorder falls back to the player's view
+    yield from found or [{"uri": f"spotify:track:{rid}", "id": rid}]
+
+
+def _iter_playlist(sp: Spotify, rid: str) -> t.Iterator[dict]:
+    pages = _iter_pages(
+        lambda offset: safe_spotify_call(
+            sp.playlist_items, rid, fields=_PLAYLIST_ITEM_FIELDS, additional_types=["track"], limit=100, offset=offset
+        ),
+        100,
+    )
+    for page in pages:
+        for it in page.get("items", []):
+            tr = it.get("track")
+            if tr and tr.get("id"):
+                yield _track_entry(tr)
+
+
+def _iter_album(sp: Spotify, rid: str) -> t.Iterator[dict]:
+    # album_tracks() returns simplified tracks without the album object; fetch it once
+    # it also carries the first 50 tracks, so that page isn't fetched again
+    album = safe_spotify_call(sp.album, rid) or {}
+    first = album.pop("tracks", None)
+    pages = _iter_pages(
+        lambda offset: safe_spotify_call(sp.album_tracks, rid, limit=50, offset=offset),
+        50,
+        first,
+    )
+    for page in pages:
+        for tr in page.get("items", []):
+            if tr.get("id"):
+                yield _track_entry(dict(tr, album=album))
+
+
+_FETCHERS: dict[str, t.Callable[[Spotify, str], t.Iterator[dict]]] = {
+    "track": _iter_track,
+    "playlist": _iter_playlist,
+    "album": _iter_album,
+}
+
+
+def is_spotify_link(url_or_id: str) -> bool:
+    return _SPOTIFY_RE.search(str(url_or_id)) is not None
+
+
+def iter_spotify_uris(sp: Spotify, url_or_id: str) -> t.Iterator[dict]:
+    """Yield per-track metadata dicts (track_meta() fields plus "uri") for a track/album/playlist link.
+
+    Pages are yielded as they arrive, so recording can start before a long listing is complete.
+    Listings already carry full track objects, so no per-track lookups are needed later.
+    """
     try:
-        url_or_id = str(url_or_id).strip()
-        # track id or URI
-        if "track/" in url_or_id or url_or_id.startswith("spotify:track:"):
-            track_id = (
-                url_or_id.split("track/")[-1].split("?")[0]
-                if "track/" in url_or_id
-                else url_or_id.split(":")[-1]
-            )
-            return [f"spotify:track:{track_id}"]
-
-        # playlist
-        if "playlist/" in url_or_id or url_or_id.startswith("spotify:playlist:"):
-            pl_id = (
-                url_or_id.split("playlist/")[-1].split("?")[0]
-                if "playlist/" in url_or_id
-                else url_or_id.split(":")[-1]
-            )
-            uris: list[str] = []
-            offset = 0
-            while True:
-                page = sp.playlist_items(pl_id, additional_types=["track"], limit=100, offset=offset)
-                items = page.get("items", [])
-                for it in items:
-                    tr = it.get("track")
-                    if tr and tr.get("id"):
-                        uris.append(f"spotify:track:{tr['id']}")
-                if page.get("next"):
-                    offset += 100
-                else:
-                    break
-            return uris
-
-        # album
-        if "album/" in url_or_id or url_or_id.startswith("spotify:album:"):
-            album_id = (
-                url_or_id.split("album/")[-1].split("?")[0]
-                if "album/" in url_or_id
-                else url_or_id.split(":")[-1]
-            )
-            uris = []
-            offset = 0
-            while True:
-                album = sp.album_tracks(album_id, limit=50, offset=offset)
-                items = album.get("items", [])
-                if not items:
-                    break
-                uris += [f"spotify:track:{tr['id']}" for tr in items if tr.get("id")]
-                if album.get("next"):
-                    offset += 50
-                else:
-                    break
-            return uris
+        m = _SPOTIFY_RE.search(str(url_or_id))
+        if not m:
+            return
+        yield from _FETCHERS[m.group(1) or m.group(2)](sp, m.group(3))
     except Exception as e:
         console.print(f"[red]Error while parsing Spotify URL: {e}[/red]")
-    return []
+
+
+def get_spotify_uris(sp: Spotify, url_or_id: str) -> list[dict]:
+    return list(iter_spotify_uris(sp, url_or_id))
+
+
+def _with_next(it: t.Iterable[dict]) -> t.Iterator[tuple[dict, t.Optional[dict]]]:
+    # pair each entry with the one after it (None for the last) without materializing the stream
+    it = iter(it)
+    cur = next(it, None)
+    while cur is not None:
+        nxt = next(it, None)
+        yield cur, nxt
+        cur = nxt
 
 
 # ------------------------ MAIN: play and record playlist ------------------------
-def play_and_record_playlist(sp: Spotify, playlist_url: str, st: Settings, start_from: int = 1) -> None:
-    global current_ffmpeg_process, current_recording_info
+MIN_FILE_BYTES = 20 * 1024  # minimal file size to consider "recorded"
+MIN_RECORDING_BYTES = 50 * 1024  # smaller than this after recording counts as a failed capture
 
-    uris = get_spotify_uris(sp, playlist_url)
-    if not uris:
-        console.print("[yellow]Playlist has no playable tracks.[/yellow]")
-        return
+_LBL_START = ("Start:", "bold sky_blue1")
+_LBL_TO = ("To:", "bold sky_blue1")
+_LBL_TARGET = ("Target duration (API±buf):", "bold sky_blue1")
 
-    console.print(f"[green]Sequential mode: {len(uris)} tracks found.[/green]")
 
-    # starting index support
-    if start_from > 1:
-        if start_from > len(uris):
-            console.print(f"[red]Start index {start_from} is larger than playlist length ({len(uris)}).[/red]")
-            return
-        console.print(f"[cyan]Starting from track #{start_from}[/cyan]")
-        uris = uris[start_from - 1 : ]
+PLAYBACK_SETTLE_SECONDS = 0.25
+PLAYBACK_CONFIRM_TIMEOUT = 3.0
 
+
+def _confirm_playback(sp: Spotify, track_id: t.Optional[str]) -> t.Optional[dict]:
+    # the player needs a moment to switch; until then it still reports the previous track
+    deadline = time.monotonic() + PLAYBACK_CONFIRM_TIMEOUT
+    while True:
+        time.sleep(PLAYBACK_SETTLE_SECONDS)
+        meta = current_track(sp)
+        if meta and meta.get("is_playing") and meta.get("id") == track_id:
+            return meta
+        if time.monotonic() >= deadline:
+            return None
+
+
+def _ensure_active_device(sp: Spotify) -> None:
     # Ensure there's an active device; attempt to transfer playback to first device if none active
     try:
         devices = sp.devices().get("devices", [])
@@ -277,78 +500,89 @@ def play_and_record_playlist(sp: Spotify, playlist_url: str, st: Settings, start
         # non-fatal
         pass
 
-    MIN_FILE_BYTES = 20 * 1024  # minimal file size to consider "recorded"
 
-    for i, uri in enumerate(uris, 1):
-        # --- fetch metadata BEFORE arming ffmpeg ---
-        meta_preview = None
-        try:
-            if uri.startswith("spotify:track:"):
-                tid = uri.split(":")[-1]
-                tr = sp.track(tid)
-                if tr:
-                    artists = tr.get("artists", []) or []
-                    names = [a.get("name", "Unknown Artist") for a in artists if isinstance(a, dict)]
-                    meta_preview = {
-                        "name": tr.get("name", "Unknown Title"),
-                        "artists": names,
-                        "artist_str": ", ".join(names),
-                        "album": (tr.get("album") or {}).get("name", "Unknown Album"),
-                        "track_number": tr.get("track_number"),
-                        "duration_ms": tr.get("duration_ms", 0),
-                        "id": tr.get("id"),
-                    }
-        except Exception:
-            meta_preview = None
+def play_and_record_playlist(sp: Spotify, playlist_url: str, st: Settings, start_from: int = 1) -> bool:
+    global current_rec
 
-        # build target directory and final filename deterministically
-        if st["organize_by_artist_album"] and meta_preview:
-            artist_folder = sanitize_for_filesystem((meta_preview.get("artists") or ["Unknown Artist"])[0])
-            album_folder = sanitize_for_filesystem(meta_preview.get("album", "Unknown Album"))
-            target_dir = st["output_directory"] / artist_folder / album_folder
-        else:
-            target_dir = st["output_directory"]
+    # tracks stream in page by page; recording starts as soon as the first page is in
+    tracks = iter_spotify_uris(sp, playlist_url)
 
-        ensure_dir(target_dir)
+    # starting index support
+    if start_from > 1:
+        console.print(f"[cyan]Starting from track #{start_from}[/cyan]")
+        tracks = itertools.islice(tracks, start_from - 1, None)
+
+    # the device hand-over (and its settle delay) runs while the library index and
+    # the first listing page are fetched; it only has to be done before the first arm
+    device_ex = ThreadPoolExecutor(max_workers=1)
+    device_fut = device_ex.submit(_ensure_active_device, sp)
+
+    # settings don't change during a run; read them once instead of per track
+    out_dir = st["output_directory"]
+    organize = st["organize_by_artist_album"]
+    fmt = st["default_format"]
+    fmt_upper = fmt.upper()
+    ffmpeg = st["ffmpeg_path"]
+    device = st["audio_device"]
+    gap = float(st.get("gap_seconds", 1.0))
+    preroll = max(0, st.get("preroll_ms", 0)) / 1000.0
+    buf_sec = float(st.get("recording_buffer_seconds", 0))
+    rewrite = st.get("rewrite_headers_enabled", False)
+    force_rewrite = st.get("force_header_rewrite", False)
+    skip_existing = st.get("skip_existing_file", True)
+    out_parent = out_dir.parent  # banner paths are shown from the output folder's own name down
+    arm_dir = out_dir / "__arming__"
+    ensure_dir(arm_dir)
+
+    # one walk over the library instead of stat+tag-read per track
+    existing = _index_existing(out_dir, MIN_FILE_BYTES) if skip_existing else {}
+
+    count = 0
+
+    console.print("[green]Sequential mode: recording tracks as the listing comes in.[/green]")
+    for i, (entry, nxt) in enumerate(_with_next(tracks), 1):
+        count = i
+        uri = entry["uri"]
+        # metadata came with the listing; entries without a name have none
+        meta_preview = entry if entry.get("name") else None
 
+        # build target directory and final filename deterministically
         if meta_preview:
-            final_out = target_dir / out_filename(meta_preview, st["default_format"])
+            final_out = _final_path(meta_preview, out_dir, organize, fmt)
         else:
-            final_out = target_dir / f"{i:02d} Unknown Title.{st['default_format']}"
+            ensure_dir(out_dir)
+            final_out = out_dir / f"{i:02d} Unknown Title.{fmt}"
 
         # check existing recorded file by spotify id tag and skip if matches
         spotify_id_for_check = meta_preview.get("id") if meta_preview else None
-        if st.get("skip_existing_file", True) and spotify_id_for_check:
-            try:
-                if final_out.exists() and final_out.stat().st_size >= MIN_FILE_BYTES:
-                    if is_already_recorded_by_spotify_id(final_out, spotify_id_for_check):
-                        console.print(f"[grey50]Skipping track #{i}: already recorded -> {final_out.name}[/grey50]")
-                        continue
-            except Exception:
-                # any tag-read error -> ignore and continue normally
-                pass
+        if skip_existing and spotify_id_for_check in existing:
+            console.print(f"[grey50]Skipping track #{i}: already recorded -> {existing[spotify_id_for_check].name}[/grey50]")
+            continue
+
+        if device_fut is not None:
+            device_fut.result()
+            device_fut = None
 
         # --- start ffmpeg (arming) ---
-        arm_dir = st["output_directory"] / "__arming__"
-        ensure_dir(arm_dir)
         temp_out = arm_dir / f"arming_{i:03d}.flac"
 
         ff_proc = start_ffmpeg(
-            st["ffmpeg_path"],
-            st["audio_device"],
+            ffmpeg,
+            device,
             max(10.0, 3600.0),
             temp_out,
-            st["default_format"],
+            fmt,
         )
 
-        armed_start_iso = datetime.now(timezone.utc).isoformat()
+        armed_start_ns = time.time_ns()
 
         # preroll
-        time.sleep(max(0, st.get("preroll_ms", 0)) / 1000.0)
+        time.sleep(preroll)
 
         # start playback on Spotify
         try:
-            safe_spotify_call(sp.start_playback, uris=[uri])
+            # a rejected start (no device, not premium, bad uri) fails here, not after the confirm timeout
+            safe_spotify_call(sp.start_playback, uris=[uri], reraise=True)
         except Exception as e:
             console.print(f"[red]FAILED to start playback → {uri} ({e})[/red]")
             log_failed_track(uri)
@@ -359,14 +593,21 @@ def play_and_record_playlist(sp: Spotify, playlist_url: str, st: Settings, start
                 pass
             continue
 
-        # small delay to allow metadata to appear in Spotify API
-        time.sleep(0.25)
-
-        meta_now = current_track(sp) or {"name": "Unknown Title", "artist_str": "Unknown Artist", "duration_ms": 0}
-
-        # if metadata missing after start, treat as failure
-        if not meta_now or not meta_now.get("id"):
-            console.print(f"[red]FAILED (no metadata after start) → {uri}[/red]")
+        # an accepted start can still leave the player on something else; one confirmed
+        # read (usually the first poll) also gives the progress the deadline is set from
+        playing = _confirm_playback(sp, entry.get("id"))
+        # the player is already past the start by now; count down from where it reports
+        end_mono = float("inf")
+        if playing:
+            end_mono = time.monotonic() + (float(playing.get("duration_ms", 0) or 0) - float(playing.get("progress_ms", 0) or 0)) / 1000.0 - 0.2
+
+        # the preview already has everything the monitor needs; the player's view
+        # is only the fallback when the listing had none
+        meta_now = meta_preview or playing
+
+        # if playback did not start or metadata is missing, treat as failure
+        if not playing or not meta_now or not meta_now.get("id"):
+            console.print(f"[red]FAILED (playback did not start) → {uri}[/red]")
             log_failed_track(uri)
             kill_ffmpeg(ff_proc)
             try:
@@ -375,75 +616,76 @@ def play_and_record_playlist(sp: Spotify, playlist_url: str, st: Settings, start
                 pass
             continue
 
-        # recompute target folder and final name from now-playing metadata (safer)
-        if st["organize_by_artist_album"]:
-            artist_folder = sanitize_for_filesystem((meta_now.get("artists") or ["Unknown Artist"])[0])
-            album_folder = sanitize_for_filesystem(meta_now.get("album", "Unknown Album"))
-            target_dir = st["output_directory"] / artist_folder / album_folder
-        else:
-            target_dir = st["output_directory"]
+        # recompute target folder and final name from now-playing metadata (safer);
+        # nothing to redo when the preview is what we are recording
+        if meta_now is not meta_preview:
+            final_out = _final_path(meta_now, out_dir, organize, fmt)
 
-        ensure_dir(target_dir)
-
-        final_out = target_dir / out_filename(meta_now, st["default_format"])
+        expected = (float(meta_now.get("duration_ms", 0) or 0) / 1000.0) + buf_sec
 
         # UI banner
         pretty_artist = meta_now.get("artist_str", "Unknown Artist")
         pretty_title = meta_now.get("name", "Unknown Title")
-        fmt_upper = st["default_format"].upper()
-
-        relative = str(final_out)
-        if "Recordings" in relative:
-            relative = "Recordings" + relative.split("Recordings", 1)[1]
-
-        banner = Text.from_markup(
-            f"""
-[bold sky_blue1]Start:[/bold sky_blue1] {escape(pretty_artist)} - {escape(pretty_title)} ({fmt_upper})
-[bold sky_blue1]To:[/bold sky_blue1] {escape(relative)}
-[bold sky_blue1]Target duration (API±buf):[/bold sky_blue1] ~{(float(meta_now.get('duration_ms', 0)) / 1000 + float(st.get('recording_buffer_seconds', 0))):.1f}s
-"""
+        try:
+            relative = os.fspath(final_out.relative_to(out_parent))
+        except ValueError:
+            relative = final_out.name
+
+        # assembled from styled fragments: nothing is markup-parsed, so no escaping needed
+        banner = Text.assemble(
+            "\n",
+            _LBL_START, f" {pretty_artist} - {pretty_title} ({fmt_upper})\n",
+            _LBL_TO, f" {relative}\n",
+            _LBL_TARGET, f" ~{expected:.1f}s\n",
         )
 
         console.print(Panel(banner, title="[white]Recording Initiated[/white]", border_style="cyan", expand=False))
 
-        # set global ffmpeg process and recording info
-        current_ffmpeg_process = ff_proc
-
-        expected = (float(meta_now.get("duration_ms", 0) or 0) / 1000.0) + float(st.get("recording_buffer_seconds", 0))
-
-        current_recording_info = {
-            "process_obj": ff_proc,
-            "track_id": meta_now.get("id"),
-            "start_iso": armed_start_iso,
-            "audio_path": temp_out,
-            "final_path": final_out,
-            "metadata": meta_now,
-            "expected_duration_sec": expected,
-            "stop_reason": "",
-            "rewrite_enabled": st.get("rewrite_headers_enabled", False),
-        }
+        # publish ffmpeg process and recording info together
+        current_rec = RecordingInfo(
+            process_obj=ff_proc,
+            track_id=meta_now.get("id"),
+            start_ns=armed_start_ns,
+            audio_path=temp_out,
+            final_path=final_out,
+            metadata=meta_now,
+            expected_duration_sec=expected,
+            rewrite_enabled=rewrite,
+            force_rewrite=force_rewrite,
+            end_mono=end_mono,
+        )
+        prefetch_cover(meta_now.get("id"), meta_now.get("cover_url"))
 
         # blocking monitor that waits for track finish / change and finalizes
         record_one_track_blocking(sp, st)
 
-        # after recording: check that the final file exists and is not trivially small
-        try:
-            if not final_out.exists() or final_out.stat().st_size < 50 * 1024:
-                console.print(f"[red]FAILED (empty or too small file) → {uri}[/red]")
-                log_failed_track(uri)
-        except Exception:
-            # ignore file-stat errors (do not crash the loop)
-            pass
+        # after recording: check that the final file exists, is not trivially
+        # small and (for FLAC) did not come out with a truncated stream header
+        if not is_valid_recording(final_out, MIN_RECORDING_BYTES):
+            console.print(f"[red]FAILED (empty, too small or corrupt file) → {uri}[/red]")
+            log_failed_track(uri)
+        elif skip_existing:
+            # playlists can repeat a track; don't record it twice in one run
+            existing[meta_now["id"]] = final_out
 
         # small gap before next track (if any)
-        if i < len(uris):
-            console.print(f"[grey58]Waiting {st.get('gap_seconds', 1.0)}s before next track…[/grey58]")
-            time.sleep(float(st.get("gap_seconds", 1.0)))
+        if nxt is not None:
+            console.print(f"[grey58]Waiting {gap}s before next track…[/grey58]")
+            time.sleep(gap)
+
+    device_ex.shutdown(wait=False)
+
+    if not count:
+        if start_from > 1:
+            console.print(f"[red]Start index {start_from} is larger than playlist length.[/red]")
+        else:
+            console.print("[yellow]Playlist has no playable tracks.[/yellow]")
+    return count > 0
 
 
 # ------------------------ simple manual follow mode (optional) ------------------------
 def manual_follow_current(sp: Spotify, st: Settings) -> None:
-    global current_ffmpeg_process, current_recording_info
+    global current_rec
 
     log_file = st["output_directory"] / "aurora_metadata.jsonl"
     ensure_dir(st["output_directory"])
@@ -453,86 +695,74 @@ def manual_follow_current(sp: Spotify, st: Settings) -> None:
     )
     worker.start()
 
-    from aurora_io import ensure_standby, drop_standby, standby_ffmpeg_process, standby_file
+    from aurora_io import ensure_standby, drop_standby, take_standby
 
     ensure_standby(st)
 
+    # loop-invariant settings, bound once
+    out_dir = st["output_directory"]
+    organize = st["organize_by_artist_album"]
+    fmt = st["default_format"]
+    poll = st["polling_interval_seconds"]
+    preroll_ms = st["preroll_ms"]
+    buf_sec = float(st.get("recording_buffer_seconds", 0))
+    rewrite = st.get("rewrite_headers_enabled", False)
+    force_rewrite = st.get("force_header_rewrite", False)
+
     try:
         with console.status("[italic grey50]Monitoring… (global pre-arm)[/italic grey50]", spinner="line", speed=1.2):
             while True:
                 meta = current_track(sp)
+                rec = current_rec
 
-                if not current_ffmpeg_process:
+                if rec is None:
                     if meta and meta.get("is_playing"):
-                        ensure_dir(st["output_directory"])
                         meta_now = meta
 
-                        if st["organize_by_artist_album"]:
-                            artist_folder = sanitize_for_filesystem((meta_now.get("artists") or ["Unknown Artist"])[0])
-                            album_folder = sanitize_for_filesystem(meta_now.get("album", "Unknown Album"))
-                            target_dir = st["output_directory"] / artist_folder / album_folder
-                        else:
-                            target_dir = st["output_directory"]
-
-                        ensure_dir(target_dir)
-                        final_out = target_dir / out_filename(meta_now, st["default_format"])
-
-                        # use standby ffmpeg process created by aurora_io
-                        current_ffmpeg_process = standby_ffmpeg_process
-                        current_recording_info = {
-                            "process_obj": current_ffmpeg_process,
-                            "track_id": meta_now.get("id"),
-                            "start_iso": datetime.now(timezone.utc).isoformat(),
-                            "audio_path": standby_file,
-                            "final_path": final_out,
-                            "metadata": meta_now,
-                            "expected_duration_sec": (float(meta_now.get("duration_ms", 0) or 0) / 1000.0) + float(st.get("recording_buffer_seconds", 0)),
-                            "stop_reason": "",
-                            "rewrite_enabled": st.get("rewrite_headers_enabled", False),
-                        }
-
-                        from aurora_io import ensure_standby as _ensure
-                        standby_ffmpeg_process = None
-                        standby_file = None
-                        _ensure(st)
+                        final_out = _final_path(meta_now, out_dir, organize, fmt)
+
+                        # hand the running standby capture over to this track
+                        ensure_standby(st)
+                        proc, standby_path = take_standby()
+                        current_rec = RecordingInfo(
+                            process_obj=proc,
+                            track_id=meta_now.get("id"),
+                            start_ns=time.time_ns(),
+                            audio_path=standby_path,
+                            final_path=final_out,
+                            metadata=meta_now,
+                            expected_duration_sec=(float(meta_now.get("duration_ms", 0) or 0) / 1000.0) + buf_sec,
+                            rewrite_enabled=rewrite,
+                            force_rewrite=force_rewrite,
+                            end_mono=time.monotonic() + (float(meta_now.get("duration_ms", 0) or 0) - float(meta_now.get("progress_ms", 0) or 0)) / 1000.0 - 0.2,
+                        )
+                        prefetch_cover(meta_now.get("id"), meta_now.get("cover_url"))
+
+                        ensure_standby(st)
                     else:
                         ensure_standby(st)
                 else:
-                    stop_reason: t.Optional[str] = None
-                    if not meta or not meta.get("is_playing"):
-                        stop_reason = "Playback stopped or track unavailable"
-                    elif meta.get("id") != current_recording_info.get("track_id"):
-                        stop_reason = "Track changed"
-                    else:
-                        try:
-                            prog = float(meta.get("progress_ms", 0) or 0)
-                            dur = float(meta.get("duration_ms", 0) or 0)
-                            if dur > 0 and prog >= max(0.0, dur - 200):
-                                stop_reason = "Track finished"
-                        except Exception:
-                            pass
-
+                    stop_reason = _classify_stop(meta, rec)
                     if stop_reason:
-                        kill_ffmpeg(current_ffmpeg_process)
-                        snap = current_recording_info.copy()
-                        snap["stop_reason"] = stop_reason
-                        finalization_task_queue.put(snap)
-                        current_ffmpeg_process = None
-                        current_recording_info = {}
-
-                time.sleep(st["polling_interval_seconds"])
+                        kill_ffmpeg(rec.process_obj)
+                        current_rec = None
+                        rec.stop_reason = stop_reason
+                        enqueue_finalization(rec)
+
+                if current_rec is not None:
+                    wait_or_wake(next_poll_delay(meta, poll, preroll_ms))
+                else:
+                    wait_or_wake(poll)
     except KeyboardInterrupt:
         console.print("[yellow]Interrupted[/yellow]")
     finally:
-        stop_worker_event.set()
-        kill_ffmpeg(current_ffmpeg_process)
-        if current_recording_info:
-            snap = current_recording_info.copy()
-            snap["stop_reason"] = "Shutdown"
-            finalization_task_queue.put(snap)
-            current_recording_info = {}
-        from aurora_io import drop_standby
+        rec, current_rec = current_rec, None
+        if rec is not None:
+            kill_ffmpeg(rec.process_obj)
+            rec.stop_reason = "Shutdown"
+            enqueue_finalization(rec)
         drop_standby()
+        finalization_task_queue.put(None)
         worker.join(timeout=10)
 
 
@@ -581,11 +811,9 @@ Use only for personal/private purposes and comply with local laws.
     # Playlist or album mode
     source = args.album or args.playlist
     if source:
-        uris = get_spotify_uris(sp, source)
-        if not uris:
-            console.print("[red]No tracks found in album or playlist.[/red]")
+        if not is_spotify_link(source):
+            console.print("[red]Invalid or unsupported album/playlist link.[/red]")
             return
-        console.print(f"[green]Sequential recording: {len(uris)} tracks detected.[/green]")
         play_and_record_playlist(sp, source, st, start_from=args.track_no)
         return
 
@@ -603,16 +831,14 @@ Use only for personal/private purposes and comply with local laws.
             console.print(f"[green]{len(links)} link(s) loaded from {p.name}[/green]")
             for i, link in enumerate(links, 1):
                 console.print(f"[yellow]({i}/{len(links)}) Playing {link}[/yellow]")
-                uris = get_spotify_uris(sp, link)
-                if not uris:
+                if not is_spotify_link(link):
                     console.print(f"[red]Invalid or unsupported link: {link}[/red]")
                     continue
                 play_and_record_playlist(sp, link, st, start_from=args.track_no)
             return
 
         # Single track
-        uris = get_spotify_uris(sp, args.track)
-        if not uris:
+        if not is_spotify_link(args.track):
             console.print("[red]Invalid or unsupported track link.[/red]")
             return
         console.print("[green]Single track mode: starting Spotify playback...[/green]")
@@ -0,0 +1,77 @@
+import queue
+import time
+import typing as t
+import threading
+
+T = t.TypeVar("T")
+
+
+# Bounded single-producer/single-consumer ring. Only the producer advances
+# _tail and only the consumer advances _head, so the slot handoff needs no
+# lock: the slot is written before _tail is published and cleared before _head
+# is. The Events are only used to park a side that has nothing to do.
+class SPSCRing(t.Generic[T]):
+    def __init__(self, capacity: int):
+        if capacity < 1 or capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        self._buf: t.List[t.Optional[T]] = [None] * capacity
+        self._mask = capacity - 1
+        self._capacity = capacity
+        self._head = 0  # next slot to read, consumer-owned
+        self._tail = 0  # next slot to write, producer-owned
+        self._not_empty = threading.Event()
+        self._not_full = threading.Event()
+        self._not_full.set()
+
+    def qsize(self) -> int:
+        return self._tail - self._head
+
+    def empty(self) -> bool:
+        return self._tail == self._head
+
+    def full(self) -> bool:
+        return self._tail - self._head >= self._capacity
+
+    def put(self, item: T, block: bool = True, timeout: t.Optional[float] = None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._tail - self._head >= self._capacity:
+            if not block:
+                raise queue.Full
+            # clear, then re-check, so a get() landing in between is not missed
+            self._not_full.clear()
+            if self._tail - self._head < self._capacity:
+                break
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise queue.Full
+            self._not_full.wait(remaining)
+        tail = self._tail
+        self._buf[tail & self._mask] = item
+        self._tail = tail + 1
+        self._not_empty.set()
+
+    def get(self, block: bool = True, timeout: t.Optional[float] = None) -> T:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._tail == self._head:
+            if not block:
+                raise queue.Empty
+            self._not_empty.clear()
+            if self._tail != self._head:
+                break
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise queue.Empty
+            self._not_empty.wait(remaining)
+        head = self._head
+        idx = head & self._mask
+        item = self._buf[idx]
+        self._buf[idx] = None
+        self._head = head + 1
+        self._not_full.set()
+        return item
+
+    def put_nowait(self, item: T) -> None:
+        self.put(item, block=False)
+
+    def get_nowait(self) -> T:
+        return self.get(block=False)